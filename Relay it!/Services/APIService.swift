@@ -6,25 +6,45 @@
 //
 
 import Foundation
+import CryptoKit
 
 /// Service for calling Vercel API endpoints
 @MainActor
 class APIService: ObservableObject {
     static let shared = APIService()
     
-    private let session = URLSession.shared
+    // Dedicated session so API calls reuse one keep-alive connection pool (TLS + HTTP/2)
+    private nonisolated let session: URLSession = {
+        let configuration = URLSessionConfiguration.default
+        configuration.urlCache = nil  // AI responses are never reused - skip the cache writes
+        configuration.timeoutIntervalForRequest = 60
+        configuration.httpMaximumConnectionsPerHost = 4
+        return URLSession(configuration: configuration)
+    }()
     private let baseURL = Config.apiBaseURL
-    private let encoder = JSONEncoder()
+    private let encoder: JSONEncoder = {
+        let encoder = JSONEncoder()
+        // Base64 image payloads are full of "/" - don't inflate them to "\/"
+        encoder.outputFormatting = .withoutEscapingSlashes
+        return encoder
+    }()
     private let decoder = JSONDecoder()
     
-    private init() {}
+    // When the backend last answered - a recent answer means the connection is still open
+    private var lastResponseAt: Date?
     
-    // MARK: - Analyze Screenshot
+    // Analysis results keyed by image content hash (re-sent screenshots skip Gemini)
+    private var analysisCache: [String: CachedAnalysis] = [:]
     
-    struct AnalyzeRequest: Encodable {
-        let image: String  // data URL format: data:image/png;base64,...
+    private struct CachedAnalysis {
+        let response: AnalyzeResponse
+        let cachedAt: Date
     }
     
+    private init() {}
+    
+    // MARK: - Analyze Screenshot
+    
     struct AnalyzeResponse: Decodable, Encodable {
         let rawText: String
         let summary: String
@@ -33,6 +53,52 @@ class APIService: ObservableObject {
         let entities: [Entity]
         let suggestedNotebookTitle: String?
         let contextClues: ContextClues?  // Optional - may not be present
+        let confidence: Double?  // 0-1, if the backend reports it
+        
+        enum CodingKeys: String, CodingKey {
+            case rawText, summary, userIntent, category, entities, suggestedNotebookTitle, contextClues, confidence
+        }
+        
+        // Tolerate fields the model left out instead of failing the whole capture,
+        // but reject responses with no analysis content at all (e.g. error payloads)
+        init(from decoder: Decoder) throws {
+            let container = try decoder.container(keyedBy: CodingKeys.self)
+            guard container.contains(.rawText) || container.contains(.summary) || container.contains(.entities) else {
+                throw DecodingError.dataCorruptedError(
+                    forKey: .rawText,
+                    in: container,
+                    debugDescription: "Response has none of rawText, summary or entities"
+                )
+            }
+            rawText = try container.decodeIfPresent(String.self, forKey: .rawText) ?? ""
+            summary = try container.decodeIfPresent(String.self, forKey: .summary) ?? ""
+            userIntent = try container.decodeIfPresent(String.self, forKey: .userIntent)
+            category = try container.decodeIfPresent(String.self, forKey: .category) ?? "generic"
+            entities = try container.decodeIfPresent([Entity].self, forKey: .entities) ?? []
+            suggestedNotebookTitle = try container.decodeIfPresent(String.self, forKey: .suggestedNotebookTitle)
+            contextClues = try container.decodeIfPresent(ContextClues.self, forKey: .contextClues)
+            confidence = try container.decodeIfPresent(Double.self, forKey: .confidence)
+        }
+        
+        /// Empty or low-confidence results are not cached, so re-capturing the same region retries them
+        var isCacheable: Bool {
+            if rawText.isEmpty && entities.isEmpty && summary.isEmpty {
+                return false
+            }
+            if let confidence, confidence < Config.analyzeConfidenceThreshold {
+                return false
+            }
+            return true
+        }
+        
+        /// Low-confidence result worth re-running on a higher-resolution image
+        var needsDetailedPass: Bool {
+            if let confidence {
+                return confidence < Config.analyzeConfidenceThreshold
+            }
+            // A text-free photo or diagram with a good summary doesn't need a second pass
+            return rawText.isEmpty && entities.isEmpty && summary.isEmpty
+        }
     }
     
     struct ContextClues: Codable {
@@ -111,15 +177,72 @@ class APIService: ObservableObject {
     /// Analyze a screenshot with Gemini
     func analyzeScreenshot(
         imageData: Data,
+        mimeType: String = "image/png",
         sessionId: UUID
     ) async throws -> AnalyzeResponse {
-        // Convert to data URL format as required by the API
-        let base64Image = imageData.base64EncodedString()
-        let dataURL = "data:image/png;base64,\(base64Image)"
+        let cacheKey = analysisCacheKey(imageData: imageData, mimeType: mimeType)
+        if let cached = cachedAnalysis(forKey: cacheKey) {
+            return cached
+        }
         
-        let request = AnalyzeRequest(image: dataURL)
+        let body = try analyzeRequestBody(imageData: imageData, mimeType: mimeType)
+        let response: AnalyzeResponse = try await post("/api/analyze", bodyData: body)
+        cacheAnalysis(response, forKey: cacheKey)
+        return response
+    }
+    
+    /// {"image": "data:<mimeType>;base64,..."} built from the base64 bytes directly.
+    /// The base64 alphabet needs no JSON escaping, so the multi-MB data URL never
+    /// becomes a String for JSONEncoder to copy and re-scan. Oversized images are
+    /// rejected before any encoding.
+    private func analyzeRequestBody(imageData: Data, mimeType: String) throws -> Data {
+        guard imageData.count <= Config.maxAnalyzeImageBytes else {
+            throw APIError.payloadTooLarge
+        }
         
-        return try await post("/api/analyze", body: request)
+        var body = Data("{\"image\":\"data:\(mimeType);base64,".utf8)
+        body.append(imageData.base64EncodedData())
+        body.append(contentsOf: "\"}".utf8)
+        return body
+    }
+    
+    // MARK: - Analysis Cache
+    
+    /// Whether analyzeScreenshot would answer this image from the cache without a request
+    func hasCachedAnalysis(imageData: Data, mimeType: String) -> Bool {
+        cachedAnalysis(forKey: analysisCacheKey(imageData: imageData, mimeType: mimeType)) != nil
+    }
+    
+    private func cachedAnalysis(forKey key: String) -> AnalyzeResponse? {
+        guard let cached = analysisCache[key],
+              Date().timeIntervalSince(cached.cachedAt) < Config.analyzeCacheTTL else {
+            return nil
+        }
+        return cached.response
+    }
+    
+    /// Content hash of an image as sent to /api/analyze
+    func analysisCacheKey(imageData: Data, mimeType: String) -> String {
+        let digest = SHA256.hash(data: imageData)
+        let hex = digest.map { String(format: "%02x", $0) }.joined()
+        return "\(mimeType):\(hex)"
+    }
+    
+    private func cacheAnalysis(_ response: AnalyzeResponse, forKey key: String) {
+        guard response.isCacheable else { return }
+        
+        let now = Date()
+        
+        if analysisCache.count >= Config.analyzeCacheMaxEntries {
+            // Drop expired entries first, then the oldest if still full
+            analysisCache = analysisCache.filter { now.timeIntervalSince($0.value.cachedAt) < Config.analyzeCacheTTL }
+            if analysisCache.count >= Config.analyzeCacheMaxEntries,
+               let oldest = analysisCache.min(by: { $0.value.cachedAt < $1.value.cachedAt }) {
+                analysisCache.removeValue(forKey: oldest.key)
+            }
+        }
+        
+        analysisCache[key] = CachedAnalysis(response: response, cachedAt: now)
     }
     
     // MARK: - Regenerate Session
@@ -141,7 +264,7 @@ class APIService: ObservableObject {
         let screens: [ScreenInput]
     }
     
-    struct RegenerateResponse: Decodable {
+    struct RegenerateResponse {
         let sessionId: String
         let sessionSummary: String
         let sessionCategory: String
@@ -149,6 +272,14 @@ class APIService: ObservableObject {
         let suggestedNotebookTitle: String?
     }
     
+    /// What the backend sends - values the client already has are not echoed back (saves output tokens)
+    private struct RegenerateWireResponse: Decodable {
+        let sessionSummary: String
+        let sessionCategory: String?
+        let entities: [Entity]
+        let suggestedNotebookTitle: String?
+    }
+    
     /// Regenerate session summary from all screenshot analyses
     func regenerateSession(
         sessionId: UUID,
@@ -163,7 +294,20 @@ class APIService: ObservableObject {
             screens: screenInputs
         )
         
-        return try await post("/api/regenerate", body: request)
+        let response: RegenerateWireResponse = try await post("/api/regenerate", body: request)
+        
+        // Fill in the echo fields locally
+        return RegenerateResponse(
+            sessionId: sessionId.uuidString,
+            sessionSummary: response.sessionSummary,
+            sessionCategory: response.sessionCategory
+                ?? previousSession?.sessionCategory
+                ?? screens.last?.analysis.category
+                ?? "generic",
+            entities: response.entities,
+            suggestedNotebookTitle: response.suggestedNotebookTitle
+                ?? screens.lazy.compactMap { $0.analysis.suggestedNotebookTitle }.first
+        )
     }
     
     // MARK: - Summarize Session
@@ -180,6 +324,20 @@ class APIService: ObservableObject {
         let recommendations: [String]
         let mergedEntities: [Entity]
         let suggestedTitle: String
+        
+        enum CodingKeys: String, CodingKey {
+            case condensedSummary, keyHighlights, recommendations, mergedEntities, suggestedTitle
+        }
+        
+        // Only the summary itself is required - list fields default to empty
+        init(from decoder: Decoder) throws {
+            let container = try decoder.container(keyedBy: CodingKeys.self)
+            condensedSummary = try container.decode(String.self, forKey: .condensedSummary)
+            keyHighlights = try container.decodeIfPresent([String].self, forKey: .keyHighlights) ?? []
+            recommendations = try container.decodeIfPresent([String].self, forKey: .recommendations) ?? []
+            mergedEntities = try container.decodeIfPresent([Entity].self, forKey: .mergedEntities) ?? []
+            suggestedTitle = try container.decodeIfPresent(String.self, forKey: .suggestedTitle) ?? "Summary"
+        }
     }
     
     /// Summarize session entities with AI-powered insights
@@ -252,6 +410,22 @@ class APIService: ObservableObject {
         try await get("/api/health")
     }
     
+    /// Open the connection to the backend ahead of an AI call (e.g. while the user is selecting a region).
+    /// Skipped when the backend answered recently, since the keep-alive connection is still open.
+    func warmUpConnection() {
+        if let lastResponseAt = lastResponseAt,
+           Date().timeIntervalSince(lastResponseAt) < Config.apiConnectionWarmWindow {
+            return
+        }
+        
+        let url = baseURL.appendingPathComponent("/api/health")
+        Task(priority: .utility) {
+            if (try? await session.data(from: url)) != nil {
+                lastResponseAt = Date()
+            }
+        }
+    }
+    
     // MARK: - HTTP Helpers
     
     private func get<T: Decodable>(_ path: String) async throws -> T {
@@ -260,22 +434,24 @@ class APIService: ObservableObject {
         request.httpMethod = "GET"
         request.timeoutInterval = 30
         
-        let (data, response) = try await session.data(for: request)
-        try validateResponse(response)
+        let data = try await send(request)
         
         return try decoder.decode(T.self, from: data)
     }
     
     private func post<T: Encodable, R: Decodable>(_ path: String, body: T) async throws -> R {
+        try await post(path, bodyData: try encoder.encode(body))
+    }
+    
+    private func post<R: Decodable>(_ path: String, bodyData: Data) async throws -> R {
         let url = baseURL.appendingPathComponent(path)
         var request = URLRequest(url: url)
         request.httpMethod = "POST"
         request.setValue("application/json", forHTTPHeaderField: "Content-Type")
-        request.httpBody = try encoder.encode(body)
+        request.httpBody = bodyData
         request.timeoutInterval = 60  // Longer timeout for AI analysis
         
-        let (data, response) = try await session.data(for: request)
-        try validateResponse(response)
+        let data = try await send(request)
         
         do {
             return try decoder.decode(R.self, from: data)
@@ -288,21 +464,76 @@ class APIService: ObservableObject {
         }
     }
     
+    /// Send request, retrying rate-limited / unavailable responses with exponential backoff
+    private func send(_ request: URLRequest) async throws -> Data {
+        var attempt = 0
+        
+        while true {
+            let (data, response) = try await session.data(for: request)
+            lastResponseAt = Date()
+            
+            do {
+                try validateResponse(response)
+                return data
+            } catch let error as APIError where error.isRetryable && attempt < Config.apiMaxRetries {
+                attempt += 1
+                
+                // Honor Retry-After if the server sent one, else 1s, 2s, 4s... plus jitter
+                let backoff = min(Config.apiRetryMaxDelay, pow(2, Double(attempt - 1)))
+                let delay = min(Config.apiRetryMaxDelay, error.retryAfter ?? backoff + Double.random(in: 0...backoff))
+                print("API \(request.url?.path ?? ""): \(error.localizedDescription), retrying in \(String(format: "%.1f", delay))s")
+                try await Task.sleep(for: .seconds(delay))
+            }
+        }
+    }
+    
     private func validateResponse(_ response: URLResponse) throws {
         guard let httpResponse = response as? HTTPURLResponse else {
             throw APIError.invalidResponse
         }
         
+        if httpResponse.statusCode == 413 {
+            throw APIError.payloadTooLarge
+        }
+        
+        if httpResponse.statusCode == 429 {
+            let retryAfter = httpResponse.value(forHTTPHeaderField: "Retry-After").flatMap(TimeInterval.init)
+            throw APIError.rateLimited(retryAfter: retryAfter)
+        }
+        
         guard 200...299 ~= httpResponse.statusCode else {
             throw APIError.httpError(statusCode: httpResponse.statusCode)
         }
     }
 }
 
+// MARK: - Entity Conversion
+extension APIService.Entity {
+    /// Entity in the shape the summarize API expects (string attributes only).
+    /// Kept compact - every byte here becomes Gemini input tokens.
+    init(_ info: ExtractedInfo) {
+        var attrs: [String: String] = [:]
+        for (key, value) in info.data {
+            if let str = value.value as? String, !str.isEmpty {
+                attrs[key] = str
+            }
+        }
+        // Title is sent at the top level - don't repeat it in attributes
+        let title = attrs.removeValue(forKey: "title")
+        self.init(
+            type: info.entityType ?? "generic",
+            title: title,
+            attributes: attrs
+        )
+    }
+}
+
 // MARK: - Errors
 enum APIError: LocalizedError {
     case invalidResponse
     case httpError(statusCode: Int)
+    case rateLimited(retryAfter: TimeInterval?)
+    case payloadTooLarge
     case decodingError(String)
     
     var errorDescription: String? {
@@ -311,8 +542,26 @@ enum APIError: LocalizedError {
             return "Invalid response from server"
         case .httpError(let statusCode):
             return "HTTP error: \(statusCode)"
+        case .rateLimited:
+            return "AI service is busy. Please try again in a moment."
+        case .payloadTooLarge:
+            return "Image is too large to analyze"
         case .decodingError(let msg):
             return "Failed to parse response: \(msg)"
         }
     }
+    
+    /// Transient failures worth retrying
+    var isRetryable: Bool {
+        switch self {
+        case .rateLimited: return true
+        case .httpError(let statusCode): return statusCode == 503
+        default: return false
+        }
+    }
+    
+    var retryAfter: TimeInterval? {
+        if case .rateLimited(let retryAfter) = self { return retryAfter }
+        return nil
+    }
 }
@@ -16,6 +16,19 @@ enum Config {
     // MARK: - API
     static let apiBaseURL = URL(string: "https://relay-that-backend.vercel.app")!
     
+    static let apiMaxRetries = 3  // Retries for rate-limited (429) / unavailable (503) responses
+    static let apiRetryMaxDelay: TimeInterval = 30
+    static let apiConnectionWarmWindow: TimeInterval = 60  // No pre-warm if the backend answered this recently
+    
+    // MARK: - Image Analysis
+    static let maxAnalyzeImageDimension: CGFloat = 1024  // Longest edge (px) sent to Gemini
+    static let detailedAnalyzeImageDimension: CGFloat = 2048  // Retry size for low-confidence results
+    static let analyzeConfidenceThreshold = 0.7
+    static let analyzeJPEGQuality: CGFloat = 0.85
+    static let maxAnalyzeImageBytes = 5 * 1024 * 1024  // Refuse to base64-encode anything larger
+    static let analyzeCacheMaxEntries = 512
+    static let analyzeCacheTTL: TimeInterval = 24 * 60 * 60  // 24 hours
+    
     // MARK: - App Settings
     static let screenshotHotkey = "⌘⇧E"
     static let maxFreeScreenshotsPerSession = 15
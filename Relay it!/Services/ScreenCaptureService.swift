@@ -88,7 +88,9 @@ class ScreenCaptureService: ObservableObject {
     
     /// Compress image to reduce file size for API calls
     private func compressImage(_ data: Data, maxBytes: Int) -> Data {
-        guard let image = NSImage(data: data) else { return data }
+        // Decode once - each quality attempt below re-encodes the same bitmap
+        guard let image = NSImage(data: data),
+              let bitmap = NSBitmapImageRep(data: data) else { return data }
         
         var quality: CGFloat = 0.8
         var compressionAttempts = 0
@@ -96,9 +98,7 @@ class ScreenCaptureService: ObservableObject {
         
         while compressedData.count > maxBytes && compressionAttempts < 5 {
             // Convert to JPEG with reduced quality
-            guard let tiffData = image.tiffRepresentation,
-                  let bitmap = NSBitmapImageRep(data: tiffData),
-                  let jpegData = bitmap.representation(using: .jpeg, properties: [.compressionFactor: quality]) else {
+            guard let jpegData = bitmap.representation(using: .jpeg, properties: [.compressionFactor: quality]) else {
                 break
             }
             
@@ -147,6 +147,67 @@ class ScreenCaptureService: ObservableObject {
         return resizedImage
     }
     
+    // MARK: - Analysis Preprocessing
+    
+    /// Downscale image so its longest edge fits the analysis budget (vision token cost scales with resolution).
+    /// Pure CPU work with no service state - safe to call off the main actor.
+    nonisolated static func prepareForAnalysis(_ data: Data, maxDimension: CGFloat = Config.maxAnalyzeImageDimension) -> (data: Data, mimeType: String) {
+        let mimeType = imageMimeType(of: data)
+        
+        guard let source = CGImageSourceCreateWithData(data as CFData, nil),
+              let properties = CGImageSourceCopyPropertiesAtIndex(source, 0, nil) as? [CFString: Any],
+              let width = properties[kCGImagePropertyPixelWidth] as? Int,
+              let height = properties[kCGImagePropertyPixelHeight] as? Int else {
+            return (data, mimeType)
+        }
+        
+        let longestEdge = CGFloat(max(width, height))
+        let needsResize = longestEdge > maxDimension
+        
+        // Small JPEGs go as-is; PNGs may still be worth converting to JPEG
+        guard needsResize || mimeType == "image/png" else {
+            return (data, mimeType)
+        }
+        
+        let options: [CFString: Any] = [
+            kCGImageSourceCreateThumbnailFromImageAlways: true,
+            kCGImageSourceCreateThumbnailWithTransform: true,
+            kCGImageSourceThumbnailMaxPixelSize: min(longestEdge, maxDimension)
+        ]
+        
+        guard let thumbnail = CGImageSourceCreateThumbnailAtIndex(source, 0, options as CFDictionary) else {
+            return (data, mimeType)
+        }
+        
+        // Decide from the pixels: screencapture writes RGBA PNGs even when nothing is transparent.
+        // Keep PNG only when some pixel really is transparent - JPEG would flatten it.
+        let isOpaque = thumbnail.isFullyOpaque
+        guard needsResize || isOpaque else {
+            return (data, mimeType)
+        }
+        
+        let outputMimeType = isOpaque ? "image/jpeg" : "image/png"
+        guard let encoded = isOpaque ? thumbnail.jpegData(quality: Config.analyzeJPEGQuality) : thumbnail.pngData() else {
+            return (data, mimeType)
+        }
+        
+        // Re-encoding without a resize only pays off if it actually shrinks the payload
+        if !needsResize && encoded.count >= data.count {
+            return (data, mimeType)
+        }
+        
+        print("Image prepared for analysis: \(width)x\(height) -> \(thumbnail.width)x\(thumbnail.height), \(data.count / 1024)KB -> \(encoded.count / 1024)KB")
+        return (encoded, outputMimeType)
+    }
+    
+    /// Detect image MIME type from the file signature (captures over 2MB are recompressed to JPEG)
+    nonisolated static func imageMimeType(of data: Data) -> String {
+        if data.starts(with: [0xFF, 0xD8, 0xFF]) {
+            return "image/jpeg"
+        }
+        return "image/png"
+    }
+    
     /// Capture entire screen (for testing)
     func captureScreen() async throws -> Data {
         isCapturing = true
@@ -266,6 +327,54 @@ extension CGImage {
         
         return mutableData as Data
     }
+    
+    /// True when every pixel is fully opaque. An alpha channel alone doesn't mean anything is transparent.
+    var isFullyOpaque: Bool {
+        switch alphaInfo {
+        case .none, .noneSkipFirst, .noneSkipLast:
+            return true
+        default:
+            break
+        }
+        
+        // Render into a known RGBA layout and scan the alpha bytes
+        let bytesPerRow = width * 4
+        var pixels = [UInt8](repeating: 0, count: bytesPerRow * height)
+        let rendered = pixels.withUnsafeMutableBytes { buffer -> Bool in
+            guard let context = CGContext(
+                data: buffer.baseAddress,
+                width: width,
+                height: height,
+                bitsPerComponent: 8,
+                bytesPerRow: bytesPerRow,
+                space: CGColorSpaceCreateDeviceRGB(),
+                bitmapInfo: CGImageAlphaInfo.premultipliedLast.rawValue
+            ) else {
+                return false
+            }
+            context.draw(self, in: CGRect(x: 0, y: 0, width: width, height: height))
+            return true
+        }
+        
+        guard rendered else { return false }
+        return stride(from: 3, to: pixels.count, by: 4).allSatisfy { pixels[$0] == 255 }
+    }
+    
+    func jpegData(quality: CGFloat) -> Data? {
+        guard let mutableData = CFDataCreateMutable(nil, 0),
+              let destination = CGImageDestinationCreateWithData(mutableData, "public.jpeg" as CFString, 1, nil) else {
+            return nil
+        }
+        
+        let properties = [kCGImageDestinationLossyCompressionQuality: quality] as CFDictionary
+        CGImageDestinationAddImage(destination, self, properties)
+        
+        guard CGImageDestinationFinalize(destination) else {
+            return nil
+        }
+        
+        return mutableData as Data
+    }
 }
 
 // MARK: - Errors
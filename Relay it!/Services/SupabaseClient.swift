@@ -17,6 +17,26 @@ actor SupabaseClient {
     private let decoder: JSONDecoder
     private let encoder: JSONEncoder
     
+    // Shared formatters - building an ISO8601DateFormatter per decoded date is expensive
+    private static let fractionalDateFormatter: ISO8601DateFormatter = {
+        let formatter = ISO8601DateFormatter()
+        formatter.formatOptions = [.withInternetDateTime, .withFractionalSeconds]
+        return formatter
+    }()
+    
+    private static let dateFormatter: ISO8601DateFormatter = {
+        let formatter = ISO8601DateFormatter()
+        formatter.formatOptions = [.withInternetDateTime]
+        return formatter
+    }()
+    
+    /// Encoder for insert/update bodies, shared by all builders
+    static let bodyEncoder: JSONEncoder = {
+        let encoder = JSONEncoder()
+        encoder.dateEncodingStrategy = .iso8601
+        return encoder
+    }()
+    
     init(supabaseURL: URL, supabaseKey: String) {
         self.url = supabaseURL
         self.anonKey = supabaseKey
@@ -27,23 +47,19 @@ actor SupabaseClient {
             let dateString = try container.decode(String.self)
             
             // Try ISO8601 with fractional seconds
-            let formatter = ISO8601DateFormatter()
-            formatter.formatOptions = [.withInternetDateTime, .withFractionalSeconds]
-            if let date = formatter.date(from: dateString) {
+            if let date = SupabaseClient.fractionalDateFormatter.date(from: dateString) {
                 return date
             }
             
             // Try without fractional seconds
-            formatter.formatOptions = [.withInternetDateTime]
-            if let date = formatter.date(from: dateString) {
+            if let date = SupabaseClient.dateFormatter.date(from: dateString) {
                 return date
             }
             
             throw DecodingError.dataCorruptedError(in: container, debugDescription: "Invalid date: \(dateString)")
         }
         
-        self.encoder = JSONEncoder()
-        self.encoder.dateEncodingStrategy = .iso8601
+        self.encoder = SupabaseClient.bodyEncoder
     }
     
     // MARK: - Auth
@@ -176,7 +192,7 @@ actor SupabaseClient {
             let sub: String
         }
         
-        guard let decoded = try? JSONDecoder().decode(JWTPayload.self, from: payload),
+        guard let decoded = try? decoder.decode(JWTPayload.self, from: payload),
               let uuid = UUID(uuidString: decoded.sub) else {
             return nil
         }
@@ -410,9 +426,7 @@ class InsertBuilder<R: Decodable> {
     init<T: Encodable>(client: SupabaseClient, table: String, values: T) {
         self.client = client
         self.table = table
-        let encoder = JSONEncoder()
-        encoder.dateEncodingStrategy = .iso8601
-        self.body = (try? encoder.encode(values)) ?? Data()
+        self.body = (try? SupabaseClient.bodyEncoder.encode(values)) ?? Data()
     }
     
     func select(_ columns: String = "*") -> Self {
@@ -442,9 +456,7 @@ class UpdateBuilder<R: Decodable> {
     init<T: Encodable>(client: SupabaseClient, table: String, values: T) {
         self.client = client
         self.table = table
-        let encoder = JSONEncoder()
-        encoder.dateEncodingStrategy = .iso8601
-        self.body = (try? encoder.encode(values)) ?? Data()
+        self.body = (try? SupabaseClient.bodyEncoder.encode(values)) ?? Data()
     }
     
     func eq(_ column: String, value: String) -> Self {
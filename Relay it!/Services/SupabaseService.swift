@@ -87,15 +87,17 @@ class SupabaseService: ObservableObject {
             throw SupabaseError.authError("Not authenticated")
         }
         
-        // Generate unique filename
-        let filename = "\(userId.uuidString)/\(UUID().uuidString).png"
+        // Generate unique filename (large captures are stored as JPEG)
+        let contentType = ScreenCaptureService.imageMimeType(of: imageData)
+        let fileExtension = contentType == "image/jpeg" ? "jpg" : "png"
+        let filename = "\(userId.uuidString)/\(UUID().uuidString).\(fileExtension)"
         
         // Upload to storage
         let imageUrl = try await client.uploadFile(
             bucket: "screenshots",
             path: filename,
             data: imageData,
-            contentType: "image/png"
+            contentType: contentType
         )
         
         // Create screenshot record
@@ -27,6 +27,12 @@ class AppState: ObservableObject {
     @Published var error: AppError?
     @Published var showCaptureSuccess = false
     
+    // Tiered analysis stats (analyze requests actually sent, and how many were high-res)
+    private var analysisCount = 0
+    private var detailedAnalysisCount = 0
+    // Previews that needed the high-res pass - re-captures of them skip the low-res call
+    private var escalatedPreviewKeys: Set<String> = []
+    
     private init() {
         setupHotkey()
     }
@@ -129,19 +135,7 @@ class AppState: ObservableObject {
             let baseName = currentSession?.name ?? "Session"
             
             // Convert entities to API format
-            let apiEntities: [APIService.Entity] = entities.map { entity in
-                var attrs: [String: String] = [:]
-                for (key, value) in entity.data {
-                    if let str = value.value as? String {
-                        attrs[key] = str
-                    }
-                }
-                return APIService.Entity(
-                    type: entity.entityType ?? "generic",
-                    title: attrs["title"],
-                    attributes: attrs
-                )
-            }
+            let apiEntities: [APIService.Entity] = entities.map { APIService.Entity($0) }
             
             // Call AI summarize API
             let response = try await api.summarizeSession(
@@ -220,15 +214,22 @@ class AppState: ObservableObject {
         }
         
         do {
-            // 1. Capture screenshot
+            // 1. Capture screenshot (warm the API connection while the user picks a region)
+            api.warmUpConnection()
             let imageData = try await screenCapture.captureRegion()
             
-            // 2. Get current screenshot count for order index
-            let screenshots = try await supabase.fetchScreenshots(sessionId: sessionId)
-            let orderIndex = screenshots.count
+            // Kick off the order-index query now so its round-trip overlaps the analysis resize
+            async let existingScreenshots = supabase.fetchScreenshots(sessionId: sessionId)
             
-            // 3. FIRST: Save screenshot to Supabase (save before AI analysis)
-            var screenshot = try await supabase.uploadScreenshot(
+            // 2. Start AI analysis right away so the Gemini round-trip overlaps the Supabase upload
+            //    (downscaled copy - storage keeps the original)
+            async let pendingAnalysis = analyzeTiered(imageData: imageData, sessionId: sessionId)
+            
+            // 3. Get current screenshot count for order index
+            let orderIndex = try await existingScreenshots.count
+            
+            // 4. Save screenshot to Supabase while analysis is in flight
+            let screenshot = try await supabase.uploadScreenshot(
                 sessionId: sessionId,
                 imageData: imageData,
                 orderIndex: orderIndex
@@ -240,80 +241,26 @@ class AppState: ObservableObject {
             // Show floating HUD notification (system-level, appears on top of all windows)
             FloatingHUD.shared.show(message: "Captured!", icon: "checkmark")
             
-            // 4. THEN: Analyze with AI
-            let analysis = try await api.analyzeScreenshot(
-                imageData: imageData,
-                sessionId: sessionId
-            )
+            // 5. Wait for AI analysis
+            let analysis = try await pendingAnalysis
             
-            // 5. Update screenshot with extracted text
-            screenshot = try await supabase.updateScreenshotText(
+            // 6. Update screenshot with extracted text (runs alongside the entity inserts below)
+            async let textUpdate = supabase.updateScreenshotText(
                 id: screenshot.id,
                 rawText: analysis.rawText
             )
             
-            // 6. Save each entity as extracted info
-            for entity in analysis.entities {
-                var dataDict: [String: AnyCodable] = [:]
-                dataDict["title"] = AnyCodable(entity.title ?? "")
-                dataDict["summary"] = AnyCodable(analysis.summary)
-                dataDict["category"] = AnyCodable(analysis.category)
-                
-                // Add new context fields (safely unwrap optionals)
-                if let intent = analysis.userIntent, !intent.isEmpty {
-                    dataDict["user_intent"] = AnyCodable(intent)
-                }
-                if let clues = analysis.contextClues {
-                    dataDict["is_comparison"] = AnyCodable(clues.isComparison ?? false)
-                    if let decision = clues.decisionPoint {
-                        dataDict["decision_point"] = AnyCodable(decision)
-                    }
-                    if let topics = clues.relatedTopics, !topics.isEmpty {
-                        dataDict["related_topics"] = AnyCodable(topics)
-                    }
-                }
-                
-                for (key, value) in entity.attributes {
-                    dataDict[key] = AnyCodable(value.stringValue)
-                }
-                
-                _ = try await supabase.createExtractedInfo(
-                    sessionId: sessionId,
-                    screenshotIds: [screenshot.id],
-                    entityType: entity.type,
-                    data: dataDict
-                )
+            // 7-8. Save extracted info. A failed insert must not cancel the OCR text write above.
+            do {
+                try await saveExtractedInfo(from: analysis, sessionId: sessionId, screenshotId: screenshot.id)
+            } catch {
+                _ = try? await textUpdate
+                throw error
             }
             
-            // 7. If no entities but we have a summary, save as generic info
-            if analysis.entities.isEmpty && !analysis.summary.isEmpty {
-                var dataDict: [String: AnyCodable] = [
-                    "title": AnyCodable(analysis.suggestedNotebookTitle ?? "Screenshot"),
-                    "summary": AnyCodable(analysis.summary)
-                ]
-                
-                if let intent = analysis.userIntent, !intent.isEmpty {
-                    dataDict["user_intent"] = AnyCodable(intent)
-                }
-                if let clues = analysis.contextClues {
-                    dataDict["is_comparison"] = AnyCodable(clues.isComparison ?? false)
-                    if let decision = clues.decisionPoint {
-                        dataDict["decision_point"] = AnyCodable(decision)
-                    }
-                    if let topics = clues.relatedTopics, !topics.isEmpty {
-                        dataDict["related_topics"] = AnyCodable(topics)
-                    }
-                }
-                
-                _ = try await supabase.createExtractedInfo(
-                    sessionId: sessionId,
-                    screenshotIds: [screenshot.id],
-                    entityType: analysis.category,
-                    data: dataDict
-                )
-            }
+            _ = try await textUpdate
             
-            // 8. Update session name if suggested
+            // 9. Update session name if suggested
             if let suggestedTitle = analysis.suggestedNotebookTitle,
                let session = currentSession,
                session.name == "New Session" || session.name.isEmpty {
@@ -330,6 +277,142 @@ class AppState: ObservableObject {
         }
     }
     
+    /// Save the entities from an analysis (or a generic summary entry if there are none)
+    private func saveExtractedInfo(
+        from analysis: APIService.AnalyzeResponse,
+        sessionId: UUID,
+        screenshotId: UUID
+    ) async throws {
+        // Save each entity as extracted info
+        for entity in analysis.entities {
+            var dataDict: [String: AnyCodable] = [:]
+            dataDict["title"] = AnyCodable(entity.title ?? "")
+            dataDict["summary"] = AnyCodable(analysis.summary)
+            dataDict["category"] = AnyCodable(analysis.category)
+            
+            // Add new context fields (safely unwrap optionals)
+            if let intent = analysis.userIntent, !intent.isEmpty {
+                dataDict["user_intent"] = AnyCodable(intent)
+            }
+            if let clues = analysis.contextClues {
+                dataDict["is_comparison"] = AnyCodable(clues.isComparison ?? false)
+                if let decision = clues.decisionPoint {
+                    dataDict["decision_point"] = AnyCodable(decision)
+                }
+                if let topics = clues.relatedTopics, !topics.isEmpty {
+                    dataDict["related_topics"] = AnyCodable(topics)
+                }
+            }
+            
+            for (key, value) in entity.attributes {
+                dataDict[key] = AnyCodable(value.stringValue)
+            }
+            
+            _ = try await supabase.createExtractedInfo(
+                sessionId: sessionId,
+                screenshotIds: [screenshotId],
+                entityType: entity.type,
+                data: dataDict
+            )
+        }
+        
+        // If no entities but we have a summary, save as generic info
+        if analysis.entities.isEmpty && !analysis.summary.isEmpty {
+            var dataDict: [String: AnyCodable] = [
+                "title": AnyCodable(analysis.suggestedNotebookTitle ?? "Screenshot"),
+                "summary": AnyCodable(analysis.summary)
+            ]
+            
+            if let intent = analysis.userIntent, !intent.isEmpty {
+                dataDict["user_intent"] = AnyCodable(intent)
+            }
+            if let clues = analysis.contextClues {
+                dataDict["is_comparison"] = AnyCodable(clues.isComparison ?? false)
+                if let decision = clues.decisionPoint {
+                    dataDict["decision_point"] = AnyCodable(decision)
+                }
+                if let topics = clues.relatedTopics, !topics.isEmpty {
+                    dataDict["related_topics"] = AnyCodable(topics)
+                }
+            }
+            
+            _ = try await supabase.createExtractedInfo(
+                sessionId: sessionId,
+                screenshotIds: [screenshotId],
+                entityType: analysis.category,
+                data: dataDict
+            )
+        }
+    }
+    
+    /// Analyze a downscaled copy first; re-send at higher resolution only when the result looks unreliable
+    /// or can't be parsed. Previews that needed the retry before go straight to high resolution.
+    private func analyzeTiered(imageData: Data, sessionId: UUID) async throws -> APIService.AnalyzeResponse {
+        // Decode/resize runs on a background thread so the UI stays responsive
+        let preview = await Task.detached(priority: .userInitiated) {
+            ScreenCaptureService.prepareForAnalysis(imageData)
+        }.value
+        let previewKey = api.analysisCacheKey(imageData: preview.data, mimeType: preview.mimeType)
+        
+        var analysis: APIService.AnalyzeResponse?
+        var previewError: Error?
+        if !escalatedPreviewKeys.contains(previewKey) {
+            do {
+                let result = try await analyze(preview, detailed: false, sessionId: sessionId)
+                guard result.needsDetailedPass else { return result }
+                analysis = result
+            } catch let error as APIError {
+                // A reply the client can't parse is as unusable as a low-confidence one
+                guard case .decodingError = error else { throw error }
+                previewError = error
+            }
+        }
+        
+        let detailed = await Task.detached(priority: .userInitiated) {
+            ScreenCaptureService.prepareForAnalysis(imageData, maxDimension: Config.detailedAnalyzeImageDimension)
+        }.value
+        
+        if detailed.data == preview.data {
+            // Image was already at full size - nothing more to show the model
+            if let analysis = analysis { return analysis }
+            if let previewError = previewError { throw previewError }
+        }
+        
+        if escalatedPreviewKeys.count >= Config.analyzeCacheMaxEntries {
+            escalatedPreviewKeys.removeAll()
+        }
+        escalatedPreviewKeys.insert(previewKey)
+        
+        do {
+            return try await analyze(detailed, detailed: true, sessionId: sessionId)
+        } catch {
+            // The low-res result is still usable
+            if let analysis = analysis { return analysis }
+            throw error
+        }
+    }
+    
+    /// Analyze one prepared image, counting only requests that miss the cache
+    private func analyze(
+        _ image: (data: Data, mimeType: String),
+        detailed: Bool,
+        sessionId: UUID
+    ) async throws -> APIService.AnalyzeResponse {
+        if !api.hasCachedAnalysis(imageData: image.data, mimeType: image.mimeType) {
+            analysisCount += 1
+            if detailed {
+                detailedAnalysisCount += 1
+                print("Analyzing at \(Int(Config.detailedAnalyzeImageDimension))px (\(detailedAnalysisCount)/\(analysisCount) requests high-res)")
+            }
+        }
+        
+        return try await api.analyzeScreenshot(
+            imageData: image.data,
+            mimeType: image.mimeType,
+            sessionId: sessionId
+        )
+    }
+    
     // MARK: - Summarize to Note
     
     /// Summarize all screenshots and insert result into the note
@@ -357,19 +440,7 @@ class AppState: ObservableObject {
             let baseName = currentSession?.name ?? "Session"
             
             // Convert entities to API format
-            let apiEntities: [APIService.Entity] = entities.map { entity in
-                var attrs: [String: String] = [:]
-                for (key, value) in entity.data {
-                    if let str = value.value as? String {
-                        attrs[key] = str
-                    }
-                }
-                return APIService.Entity(
-                    type: entity.entityType ?? "generic",
-                    title: attrs["title"],
-                    attributes: attrs
-                )
-            }
+            let apiEntities: [APIService.Entity] = entities.map { APIService.Entity($0) }
             
             // Call AI summarize/regenerate API
             let response = try await api.summarizeSession(
@@ -267,8 +267,16 @@ class SessionViewModel: ObservableObject {
         }
         
         // Prepare Context
+        // First entity per screenshot, indexed once instead of searched per screenshot
+        var entityByScreenshot: [UUID: ExtractedInfo] = [:]
+        for entity in entities {
+            for screenshotId in entity.screenshotIds where entityByScreenshot[screenshotId] == nil {
+                entityByScreenshot[screenshotId] = entity
+            }
+        }
+
         let chatScreenshots = screenshots.compactMap { screen -> APIService.ChatScreenshot? in
-            let entity = entities.first { $0.screenshotIds.contains(screen.id) }
+            let entity = entityByScreenshot[screen.id]
             // Get summary from entity attributes if available
             var summary = ""
             if let entity = entity, let sum = entity.data["summary"]?.value as? String {
@@ -349,19 +357,7 @@ class SessionViewModel: ObservableObject {
             }
             
             // Convert to API format
-            let apiEntities: [APIService.Entity] = contextEntities.map { entity in
-                var attrs: [String: String] = [:]
-                for (key, value) in entity.data {
-                    if let str = value.value as? String {
-                        attrs[key] = str
-                    }
-                }
-                return APIService.Entity(
-                    type: entity.entityType ?? "generic",
-                    title: attrs["title"],
-                    attributes: attrs
-                )
-            }
+            let apiEntities: [APIService.Entity] = contextEntities.map { APIService.Entity($0) }
             
             // Call summarize API
             let response = try await api.summarizeSession(
@@ -443,8 +439,15 @@ class SessionViewModel: ObservableObject {
         defer { isRegenerating = false }
         
         do {
-            for entityId in selectedEntityIds {
-                try await supabase.softDeleteExtractedInfo(id: entityId)
+            // Independent requests - send them concurrently instead of one round-trip at a time
+            let supabase = self.supabase
+            try await withThrowingTaskGroup(of: Void.self) { group in
+                for entityId in selectedEntityIds {
+                    group.addTask {
+                        try await supabase.softDeleteExtractedInfo(id: entityId)
+                    }
+                }
+                try await group.waitForAll()
             }
             
             entities = entities.filter { !selectedEntityIds.contains($0.id) }
@@ -6,6 +6,7 @@
 //
 
 import Testing
+import AppKit
 @testable import Relay_it_
 
 struct Relay_it_Tests {
@@ -15,3 +16,124 @@ struct Relay_it_Tests {
     }
 
 }
+
+struct AnalysisCacheTests {
+
+    private func decode(_ json: String) throws -> APIService.AnalyzeResponse {
+        try JSONDecoder().decode(APIService.AnalyzeResponse.self, from: Data(json.utf8))
+    }
+
+    @Test func emptyResultIsNotCached() throws {
+        let response = try decode(#"{"rawText": "", "summary": "", "entities": []}"#)
+        #expect(!response.isCacheable)
+    }
+
+    @Test func lowConfidenceResultIsNotCached() throws {
+        let response = try decode(#"{"rawText": "Receipt", "summary": "A receipt", "entities": [], "confidence": 0.3}"#)
+        #expect(!response.isCacheable)
+    }
+
+    @Test func summaryOnlyResultSkipsDetailedPass() throws {
+        let response = try decode(#"{"rawText": "", "summary": "A mountain landscape photo", "entities": []}"#)
+        #expect(!response.needsDetailedPass)
+    }
+
+    @Test func emptyResultNeedsDetailedPass() throws {
+        let response = try decode(#"{"rawText": "", "summary": "", "entities": []}"#)
+        #expect(response.needsDetailedPass)
+    }
+
+    @Test func usableResultIsCached() throws {
+        let response = try decode(#"{"rawText": "Receipt", "summary": "A receipt", "entities": [], "confidence": 0.9}"#)
+        #expect(response.isCacheable)
+    }
+
+}
+
+struct ResponseDecodingTests {
+
+    private let decoder = JSONDecoder()
+
+    @Test func analyzeResponseDefaultsMissingFields() throws {
+        let json = #"{"rawText": "Total $12.50"}"#
+        let response = try decoder.decode(APIService.AnalyzeResponse.self, from: Data(json.utf8))
+        #expect(response.rawText == "Total $12.50")
+        #expect(response.summary == "")
+        #expect(response.category == "generic")
+        #expect(response.entities.isEmpty)
+        #expect(response.confidence == nil)
+    }
+
+    @Test func analyzeResponseRejectsPayloadWithoutContent() {
+        let json = #"{"error": "Gemini request failed"}"#
+        #expect(throws: DecodingError.self) {
+            try decoder.decode(APIService.AnalyzeResponse.self, from: Data(json.utf8))
+        }
+    }
+
+    @Test func summarizeResponseDefaultsListsAndTitle() throws {
+        let json = #"{"condensedSummary": "Three laptops compared"}"#
+        let response = try decoder.decode(APIService.SummarizeResponse.self, from: Data(json.utf8))
+        #expect(response.condensedSummary == "Three laptops compared")
+        #expect(response.keyHighlights.isEmpty)
+        #expect(response.recommendations.isEmpty)
+        #expect(response.mergedEntities.isEmpty)
+        #expect(response.suggestedTitle == "Summary")
+    }
+
+    @Test func summarizeResponseRequiresSummary() {
+        let json = #"{"keyHighlights": ["Cheapest option"]}"#
+        #expect(throws: DecodingError.self) {
+            try decoder.decode(APIService.SummarizeResponse.self, from: Data(json.utf8))
+        }
+    }
+
+}
+
+struct AnalysisImageTests {
+
+    /// RGBA image (alpha channel present) - either fully opaque or with a transparent half
+    private func makeRGBAImage(size: Int, transparentHalf: Bool) throws -> CGImage {
+        let context = try #require(CGContext(
+            data: nil,
+            width: size,
+            height: size,
+            bitsPerComponent: 8,
+            bytesPerRow: size * 4,
+            space: CGColorSpaceCreateDeviceRGB(),
+            bitmapInfo: CGImageAlphaInfo.premultipliedLast.rawValue
+        ))
+        context.setFillColor(CGColor(red: 0.2, green: 0.4, blue: 0.8, alpha: 1))
+        context.fill(CGRect(x: 0, y: 0, width: size, height: size))
+        if transparentHalf {
+            context.clear(CGRect(x: 0, y: 0, width: size / 2, height: size))
+        }
+        return try #require(context.makeImage())
+    }
+
+    @Test func opaqueRGBAImageIsOpaque() throws {
+        let image = try makeRGBAImage(size: 32, transparentHalf: false)
+        #expect(image.alphaInfo == .premultipliedLast)
+        #expect(image.isFullyOpaque)
+    }
+
+    @Test func transparentImageIsNotOpaque() throws {
+        let image = try makeRGBAImage(size: 32, transparentHalf: true)
+        #expect(!image.isFullyOpaque)
+    }
+
+    @Test func opaqueRGBAPNGIsSentAsJPEG() throws {
+        let png = try #require(try makeRGBAImage(size: 200, transparentHalf: false).pngData())
+        let prepared = ScreenCaptureService.prepareForAnalysis(png, maxDimension: 100)
+        #expect(prepared.mimeType == "image/jpeg")
+        #expect(ScreenCaptureService.imageMimeType(of: prepared.data) == "image/jpeg")
+    }
+
+    @Test func transparentPNGStaysPNG() throws {
+        let png = try #require(try makeRGBAImage(size: 200, transparentHalf: true).pngData())
+        let prepared = ScreenCaptureService.prepareForAnalysis(png, maxDimension: 100)
+        #expect(prepared.mimeType == "image/png")
+        #expect(ScreenCaptureService.imageMimeType(of: prepared.data) == "image/png")
+    }
+
+}